@@ -1,13 +1,31 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from whoosh.qparser import QueryParser
-from indexer import init_index
+from indexer import init_partitions
+from searcher import search_partitions
 import uvicorn
 from datetime import datetime
 from settings import INDEX_DIR
 
+# Partitions de l'index et suggestions en mémoire, chargées au démarrage de
+# l'API et non à l'import : les processus de recherche ("spawn") réimportent
+# ce module et ne doivent ni ouvrir l'index en écriture ni se connecter à MongoDB
+ixs = []
+suggestions = None
+
+@asynccontextmanager
+async def lifespan(app):
+    global ixs, suggestions
+    from suggest import SuggestCache
+    ixs = init_partitions()
+    # Première construction des suggestions, en arrière-plan
+    suggestions = SuggestCache(ixs)
+    suggestions.start()
+    yield
+
 # Initialise l'API FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Active CORS pour permettre les requêtes depuis Streamlit ou un frontend web
 app.add_middleware(
@@ -18,43 +36,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Charge l'index Whoosh au démarrage de l'API
-ix = init_index()
-
 @app.get("/search")
-async def search(q: str, limit: int = 10):
+def search(q: str, background_tasks: BackgroundTasks, limit: int = 10):
     """
     Endpoint pour effectuer une recherche dans l'index Whoosh.
+    Synchrone : FastAPI l'exécute dans un thread, la boucle d'événements
+    reste libre pendant l'attente des processus de recherche.
     Exemple : /search?q=python&limit=5
     """
+    from suggest import record_query
     try:
-        with ix.searcher() as searcher:
-            query_parser = QueryParser("content", ix.schema)
-            query = query_parser.parse(q)
-            results = searcher.search(query, limit=limit)
+        query_parser = QueryParser("content", ixs[0].schema)
+        query = query_parser.parse(q)
+        hits, count = search_partitions(ixs, query, limit=limit)
 
-            # Formate les résultats pour une réponse JSON claire
-            formatted_results = []
-            for hit in results:
-                formatted_results.append({
-                    "url": hit["url"],
-                    "title": hit.get("title", "Sans titre"),
-                    "snippet": hit.get("snippet", ""),
-                    "crawled_date": hit.get("crawled_date", datetime.now()).isoformat()
-                })
+        # Formate les résultats pour une réponse JSON claire
+        formatted_results = []
+        for score, hit in hits:
+            formatted_results.append({
+                "url": hit["url"],
+                "title": hit.get("title", "Sans titre"),
+                "snippet": hit.get("snippet", ""),
+                "crawled_date": hit.get("crawled_date", datetime.now()).isoformat()
+            })
 
-            return {"query": q, "results": formatted_results, "count": len(results)}
+        # Enregistrée après la réponse, hors du chemin de la requête
+        if count:
+            background_tasks.add_task(record_query, q)
+
+        return {"query": q, "results": formatted_results, "count": count}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la recherche : {str(e)}")
 
+@app.get("/suggest")
+async def suggest(q: str, limit: int = 10):
+    """
+    Endpoint d'autocomplétion par préfixe, servi depuis la mémoire.
+    Renvoie une liste vide tant que les suggestions ne sont pas construites.
+    Exemple : /suggest?q=pyt&limit=5
+    """
+    try:
+        if suggestions is None:
+            return {"query": q, "suggestions": []}
+        return {"query": q, "suggestions": suggestions.suggest(q, limit=limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la suggestion : {str(e)}")
+
 @app.get("/status")
 async def status():
     """Endpoint pour vérifier l'état de l'index."""
     try:
         return {
             "index_path": INDEX_DIR,
-            "doc_count": ix.doc_count(),
+            "partitions": len(ixs),
+            "doc_count": sum(ix.doc_count() for ix in ixs),
             "last_updated": datetime.now().isoformat()
         }
     except Exception as e:
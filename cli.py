@@ -2,6 +2,8 @@ import click
 import time
 import asyncio
 from crawler import crawl_async, load_seeds, update_whoosh_index
+from pagerank import update_pagerank
+from scheduler import recrawl_report
 
 @click.group()
 def cli():
@@ -21,12 +23,33 @@ def crawl(start_url, max_pages, max_tasks):
     click.echo(f"✅ Crawl terminé en {time.time() - start_time:.2f} secondes.")
 
 @cli.command()
-def update_index():
+@click.option('--processes', default=None, type=int, help="Nombre de processus d'indexation (défaut : un par partition).")
+@click.option('--rebuild', is_flag=True, help="Supprime l'index et réindexe toutes les pages (ex: après un changement de INDEX_PARTITIONS).")
+def update_index(processes, rebuild):
     """Met à jour l'index Whoosh avec les pages en attente."""
     start_time = time.time()
-    update_whoosh_index()
+    update_whoosh_index(processes=processes, rebuild=rebuild)
     click.echo(f"✅ Index mis à jour en {time.time() - start_time:.2f} secondes.")
 
+@cli.command()
+def pagerank():
+    """Recalcule le PageRank à partir du graphe de liens crawlé."""
+    start_time = time.time()
+    updated = update_pagerank()
+    click.echo(f"✅ PageRank recalculé en {time.time() - start_time:.2f} secondes ({updated} pages à réindexer).")
+
+@cli.command("recrawl-report")
+def recrawl_report_cmd():
+    """Affiche le budget de crawl économisé et la fraîcheur estimée de l'index."""
+    report = recrawl_report()
+    click.echo(f"📈 URLs suivies: {report['urls']}, récupérations: {report['fetches']}")
+    click.echo(f"💰 Planification fixe: {report['fixed_fetches']} récupérations, "
+               f"économisées: {report['saved_fetches']} ({report['saved_ratio']:.1%})")
+    click.echo(f"🔁 Visites ayant trouvé une modification: {report['change_ratio']:.1%}")
+    if report["freshness"] is not None:
+        click.echo(f"🌿 Fraîcheur estimée de l'index: {report['freshness']:.1%}")
+    click.echo(f"⏰ URLs en retard de visite: {report['overdue']}")
+
 @cli.command()
 @click.option('--max-pages', default=20000, type=int, help="Nombre maximum de pages à crawler.")
 @click.option('--max-tasks', default=50, type=int, help="Nombre maximum de tâches simultanées.")
@@ -45,19 +68,25 @@ def search(query):
     """Effectue une recherche dans l'index Whoosh."""
     from whoosh.index import open_dir
     from whoosh.qparser import QueryParser
+    from indexer import partition_dirs, check_partition_layout
+    from searcher import search_partitions
+    try:
+        check_partition_layout()
+    except RuntimeError as e:
+        click.echo(f"❌ {e}", err=True)
+        return
     try:
-        ix = open_dir("indexdir")
+        ixs = [open_dir(index_dir) for index_dir in partition_dirs()]
     except Exception as e:
         click.echo("❌ Index Whoosh non trouvé. Exécutez d'abord 'update-index'.", err=True)
         return
-    with ix.searcher() as searcher:
-        query_parser = QueryParser("content", ix.schema)
-        whoosh_query = query_parser.parse(query)
-        results = searcher.search(whoosh_query, limit=10)
-        for hit in results:
-            click.echo(f"📄 {hit['title']} ({hit['url']}): {hit['snippet']}")
-        if not results:
-            click.echo("🔍 Aucun résultat trouvé.")
+    query_parser = QueryParser("content", ixs[0].schema)
+    whoosh_query = query_parser.parse(query)
+    hits, _ = search_partitions(ixs, whoosh_query, limit=10)
+    for _, hit in hits:
+        click.echo(f"📄 {hit['title']} ({hit['url']}): {hit['snippet']}")
+    if not hits:
+        click.echo("🔍 Aucun résultat trouvé.")
 
 if __name__ == "__main__":
     cli()
@@ -6,8 +6,14 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 from datetime import datetime, timedelta
 import urllib.robotparser
-from db import urls_collection, pages_collection
-from settings import MY_USER_AGENT, RECRAWL_DELAY_DAYS, MAX_RETRIES
+import multiprocessing
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pymongo import UpdateOne
+from db import urls_collection, pages_collection, links_collection
+from pagerank import update_pagerank
+from scheduler import content_hash, schedule_after_fetch, backfill_schedule, error_backoff
+from settings import MY_USER_AGENT, RECRAWL_DELAY_DAYS, RECRAWL_MAX_DAYS, MAX_RETRIES, INDEX_DIR, INDEX_BATCH_SIZE
 
 # Cache pour les parsers robots.txt et gestion du crawl-delay
 robots_cache = {}
@@ -62,17 +68,16 @@ def normalize_url(base_url, link_url):
     return parsed.scheme + "://" + parsed.netloc + parsed.path
 
 def get_next_url():
-    """Récupère la prochaine URL à crawler depuis MongoDB."""
+    """Récupère la prochaine URL à crawler depuis MongoDB.
+
+    Les URLs nouvelles comme déjà crawlées sont servies par ordre de
+    `next_crawl_at`, via l'index (status, next_crawl_at).
+    """
+    now = datetime.now()
     return urls_collection.find_one_and_update(
-        {
-            "status": "pending",
-            "$or": [
-                {"last_crawled": {"$exists": False}},
-                {"last_crawled": {"$lt": datetime.now() - timedelta(days=RECRAWL_DELAY_DAYS)}}
-            ]
-        },
-        {"$set": {"status": "in_progress", "started_at": datetime.now()}},
-        sort=[("discovered_at", 1)]
+        {"status": {"$in": ["pending", "done"]}, "next_crawl_at": {"$lte": now}},
+        {"$set": {"status": "in_progress", "started_at": now}},
+        sort=[("next_crawl_at", 1)]
     )
 
 async def fetch(session, url, headers=None):
@@ -103,7 +108,11 @@ async def process_url(session, url_doc):
         print(f"⏹️ Limite de {MAX_PAGES_PER_DOMAIN} pages atteinte pour {domain}. Ignoré.")
         urls_collection.update_one(
             {"_id": url_doc["_id"]},
-            {"$set": {"status": "done", "last_crawled": datetime.now()}}
+            {"$set": {
+                "status": "done",
+                "last_crawled": datetime.now(),
+                "next_crawl_at": datetime.now() + timedelta(days=RECRAWL_DELAY_DAYS)
+            }}
         )
         return
 
@@ -113,7 +122,10 @@ async def process_url(session, url_doc):
     allowed, crawl_delay = can_crawl(url)
     if not allowed:
         print(f"🚫 Robots.txt interdit: {url}")
-        urls_collection.update_one({"_id": url_doc["_id"]}, {"$set": {"status": "done"}})
+        urls_collection.update_one(
+            {"_id": url_doc["_id"]},
+            {"$set": {"status": "done", "next_crawl_at": datetime.now() + timedelta(days=RECRAWL_MAX_DAYS)}}
+        )
         return
 
     # Respect du crawl-delay
@@ -135,10 +147,19 @@ async def process_url(session, url_doc):
     last_access[domain] = datetime.now()
 
     if not html:
-        urls_collection.update_one(
-            {"_id": url_doc["_id"]},
-            {"$set": {"status": "error", "last_crawled": datetime.now()}, "$inc": {"retries": 1}}
-        )
+        if url_doc.get("last_checked"):
+            # URL déjà suivie : on garde son historique et on réessaie plus tard
+            retry_in = error_backoff(url_doc.get("retries", 0))
+            urls_collection.update_one(
+                {"_id": url_doc["_id"]},
+                {"$set": {"status": "done", "next_crawl_at": datetime.now() + timedelta(days=retry_in)},
+                 "$inc": {"retries": 1}}
+            )
+        else:
+            urls_collection.update_one(
+                {"_id": url_doc["_id"]},
+                {"$set": {"status": "error", "last_crawled": datetime.now()}, "$inc": {"retries": 1}}
+            )
         return
 
     # Parsing du HTML
@@ -147,42 +168,77 @@ async def process_url(session, url_doc):
     content = re.sub(r'\s+', ' ', soup.get_text()).strip()
     snippet = content[:200] + "..." if len(content) > 200 else content
 
-    # Stocke la page dans MongoDB
-    doc = {
-        "url": url,
-        "title": title,
-        "content": content,
-        "snippet": snippet,
-        "crawled_date": datetime.now(),
-        "status": "index_pending"
-    }
-    pages_collection.update_one({"url": url}, {"$set": doc}, upsert=True)
+    # Compare avec la version précédente pour ajuster la fréquence de visite
+    changed, schedule = schedule_after_fetch(url_doc, content_hash(content))
+
+    # Stocke la page dans MongoDB (réindexée seulement si elle a changé)
+    if changed:
+        doc = {
+            "url": url,
+            "title": title,
+            "content": content,
+            "snippet": snippet,
+            "crawled_date": datetime.now(),
+            "status": "index_pending"
+        }
+        pages_collection.update_one({"url": url}, {"$set": doc}, upsert=True)
+    else:
+        print(f"♻️ Page inchangée: {url}")
 
     # Incrémente le compteur de pages pour ce domaine
     domain_page_count[domain] += 1
     print(f"📊 Pages crawées pour {domain}: {domain_page_count[domain]}/{MAX_PAGES_PER_DOMAIN}")
 
     # Découverte de nouveaux liens
+    outgoing_links = {}
     for link in soup.find_all("a", href=True):
         absolute_link = normalize_url(url, link["href"])
-        if absolute_link:
-            urls_collection.update_one(
-                {"url": absolute_link},
-                {"$setOnInsert": {
-                    "url": absolute_link,
-                    "status": "pending",
-                    "discovered_at": datetime.now(),
-                    "retries": 0
-                }},
-                upsert=True
-            )
+        if absolute_link and absolute_link != url:
+            outgoing_links[absolute_link] = None
+
+    for absolute_link in outgoing_links:
+        urls_collection.update_one(
+            {"url": absolute_link},
+            {"$setOnInsert": {
+                "url": absolute_link,
+                "status": "pending",
+                "discovered_at": datetime.now(),
+                "next_crawl_at": datetime.now(),
+                "retries": 0
+            }},
+            upsert=True
+        )
+
+    # Conserve la liste des liens sortants pour le calcul du PageRank
+    links_collection.update_one(
+        {"url": url},
+        {"$set": {"url": url, "links": list(outgoing_links), "updated_at": datetime.now()}},
+        upsert=True
+    )
 
     # Mise à jour du statut de l'URL
     urls_collection.update_one(
         {"_id": url_doc["_id"]},
-        {"$set": {"status": "done", "last_crawled": datetime.now()}}
+        {"$set": {"status": "done", "last_crawled": datetime.now(), "retries": 0, **schedule}}
+    )
+    print(f"✅ Page stockée: {title[:40]} (prochaine visite: {schedule['next_crawl_at']:%Y-%m-%d %H:%M})")
+
+def reset_frontier():
+    """Vide la file d'attente avant un crawl.
+
+    Les URLs déjà récupérées gardent leur historique de modifications et
+    restent planifiées, même si le crawl précédent a été interrompu.
+    """
+    urls_collection.update_many(
+        {"status": {"$in": ["in_progress", "error"]}, "last_checked": {"$exists": True}},
+        {"$set": {"status": "done"}}
     )
-    print(f"✅ Page stockée: {title[:40]}")
+    urls_collection.delete_many({
+        "status": {"$in": ["pending", "in_progress", "error"]},
+        "last_checked": {"$exists": False}
+    })
+    print("🗑️ Cleared pending URLs from the database.")
+    backfill_schedule()
 
 async def crawl_async(seeds=None, max_pages=20000, max_concurrent_tasks=50, max_per_domain=2):
     """Lance le crawling asynchrone à partir d'une liste de seeds."""
@@ -192,9 +248,7 @@ async def crawl_async(seeds=None, max_pages=20000, max_concurrent_tasks=50, max_
     if seeds is None:
         seeds = load_seeds()
 
-    # Nettoyage de la file d'attente
-    urls_collection.delete_many({"status": {"$in": ["pending", "in_progress", "error"]}})
-    print("🗑️ Cleared pending URLs from the database.")
+    reset_frontier()
 
     # Ajout des seeds
     now = datetime.now()
@@ -207,7 +261,9 @@ async def crawl_async(seeds=None, max_pages=20000, max_concurrent_tasks=50, max_
                     "status": "pending",
                     "discovered_at": now,
                     "retries": 0
-                }
+                },
+                # Une seed déjà crawlée garde sa planification
+                "$setOnInsert": {"next_crawl_at": now}
             },
             upsert=True
         )
@@ -243,18 +299,62 @@ async def crawl_async(seeds=None, max_pages=20000, max_concurrent_tasks=50, max_
 
     print(f"=== Crawl terminé: {processed_pages} pages ===")
 
-def update_whoosh_index():
-    """Met à jour l'index Whoosh avec les pages en attente."""
-    from whoosh.index import open_dir
-    ix = open_dir("indexdir")
+    # Recalcul incrémental du PageRank avec le graphe mis à jour
+    update_pagerank()
+
+def index_partition(partition, page_ids):
+    """Indexe un lot de pages dans une partition (exécuté dans un processus dédié)."""
+    from indexer import init_index, page_fields, partition_dirs
+    ix = init_index(partition_dirs()[partition])
     writer = ix.writer()
-    for page in pages_collection.find({"status": "index_pending"}):
-        writer.update_document(
-            url=page["url"],
-            title=page["title"],
-            content=page["content"],
-            snippet=page["snippet"]
-        )
-        pages_collection.update_one({"_id": page["_id"]}, {"$set": {"status": "indexed"}})
+    # Lecture par lots pour rester sous la taille maximale d'une requête MongoDB
+    chunks = [page_ids[i:i + INDEX_BATCH_SIZE] for i in range(0, len(page_ids), INDEX_BATCH_SIZE)]
+    written = []
+    for chunk in chunks:
+        for page in pages_collection.find({"_id": {"$in": chunk}}):
+            writer.update_document(**page_fields(page))
+            # Version écrite : une page modifiée entre-temps (nouveau crawl ou
+            # nouveau PageRank) doit rester en attente d'indexation
+            written.append(UpdateOne(
+                {
+                    "_id": page["_id"],
+                    "status": "index_pending",
+                    "crawled_date": page.get("crawled_date"),
+                    "pagerank_updated": page.get("pagerank_updated")
+                },
+                {"$set": {"status": "indexed"}}
+            ))
     writer.commit()
+    for i in range(0, len(written), INDEX_BATCH_SIZE):
+        pages_collection.bulk_write(written[i:i + INDEX_BATCH_SIZE], ordered=False)
+    return len(written)
+
+def update_whoosh_index(processes=None, rebuild=False):
+    """Met à jour l'index Whoosh avec les pages en attente.
+
+    Les pages sont réparties entre les partitions et chaque partition est
+    écrite par son propre processus, avec son propre verrou d'écriture.
+    Avec `rebuild`, l'index est supprimé et toutes les pages sont réindexées,
+    par exemple après un changement de INDEX_PARTITIONS.
+    """
+    from indexer import partition_for, init_partitions
+    if rebuild:
+        shutil.rmtree(INDEX_DIR, ignore_errors=True)
+        pages_collection.update_many({}, {"$set": {"status": "index_pending"}})
+        print(f"🧹 Index {INDEX_DIR} supprimé, toutes les pages seront réindexées.")
+    # Crée aussi les partitions qui ne reçoivent aucune page de ce lot
+    partitions = len(init_partitions())
+    batches = [[] for _ in range(partitions)]
+    for page in pages_collection.find({"status": "index_pending"}, {"url": 1}):
+        batches[partition_for(page["url"])].append(page["_id"])
+    jobs = [(partition, ids) for partition, ids in enumerate(batches) if ids]
+
+    if len(jobs) <= 1 or processes == 1:
+        for partition, ids in jobs:
+            index_partition(partition, ids)
+    else:
+        # "spawn" : chaque processus ouvre sa propre connexion MongoDB
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes or len(jobs), mp_context=context) as pool:
+            list(pool.map(index_partition, *zip(*jobs)))
     print(f"📝 Index mis à jour avec {pages_collection.count_documents({'status': 'indexed'})} pages.")
@@ -1,5 +1,5 @@
 import pymongo
-from settings import MONGO_URI
+from settings import MONGO_URI, SUGGEST_QUERY_TTL_DAYS
 
 client = pymongo.MongoClient(MONGO_URI)
 db = client["Whooshy"]
@@ -7,7 +7,14 @@ db = client["Whooshy"]
 # Crée des indexes utiles si pas déjà présents
 db["urls"].create_index("url", unique=True)
 db["urls"].create_index("status")
+db["urls"].create_index([("status", pymongo.ASCENDING), ("next_crawl_at", pymongo.ASCENDING)])
 db["pages"].create_index("url", unique=True)
+db["links"].create_index("url", unique=True)
+db["queries"].create_index("query", unique=True)
+db["queries"].create_index([("count", pymongo.DESCENDING)])
+db["queries"].create_index("last_seen", expireAfterSeconds=SUGGEST_QUERY_TTL_DAYS * 86400)
 
 urls_collection = db["urls"]
-pages_collection = db["pages"]
\ No newline at end of file
+pages_collection = db["pages"]
+links_collection = db["links"]
+queries_collection = db["queries"]
\ No newline at end of file
@@ -1,29 +1,104 @@
-import os, shutil
-from whoosh.fields import Schema, TEXT, ID, DATETIME
-from whoosh.index import create_in, open_dir
+import os, shutil, zlib
+from datetime import datetime
+from urllib.parse import urlparse
+from whoosh.fields import Schema, TEXT, ID, DATETIME, COLUMN
+from whoosh.columns import NumericColumn
+from whoosh.index import create_in, open_dir, exists_in
 
-from settings import INDEX_DIR
+from settings import INDEX_DIR, INDEX_PARTITIONS, INDEX_PARTITION_MODE, DEFAULT_PAGERANK
 
-def init_index():
+def pagerank_field():
+    # Colonne triable (float32) lue directement pendant le scoring. Le PageRank
+    # vaut 1 en moyenne : c'est la valeur neutre des pages encore sans score.
+    return COLUMN(NumericColumn("f", default=DEFAULT_PAGERANK))
+
+def partition_dirs(partitions=None):
+    """Retourne le répertoire de chaque partition (INDEX_DIR si une seule)."""
+    partitions = INDEX_PARTITIONS if partitions is None else partitions
+    if partitions <= 1:
+        return [INDEX_DIR]
+    return [os.path.join(INDEX_DIR, f"part-{i:02d}") for i in range(partitions)]
+
+def partition_for(url, partitions=None, mode=None):
+    """Retourne la partition d'une URL, par hash de l'URL ou de son domaine.
+
+    crc32 est stable d'un processus à l'autre, contrairement à hash() : une
+    URL est donc toujours réindexée dans la même partition. Changer le nombre
+    de partitions impose de reconstruire l'index (`update-index --rebuild`).
+    """
+    partitions = INDEX_PARTITIONS if partitions is None else partitions
+    mode = mode or INDEX_PARTITION_MODE
+    key = urlparse(url).netloc if mode == "domain" else url
+    return zlib.crc32(key.encode("utf-8")) % max(partitions, 1)
+
+def init_index(index_dir=INDEX_DIR):
     schema = Schema(
         url=ID(stored=True, unique=True),
         title=TEXT(stored=True, field_boost=2.0),
         content=TEXT,
         snippet=TEXT(stored=True),
-        crawled_date=DATETIME(stored=True)
+        crawled_date=DATETIME(stored=True),
+        pagerank=pagerank_field()
     )
-    if not os.path.exists(INDEX_DIR):
-        os.mkdir(INDEX_DIR)
-        return create_in(INDEX_DIR, schema)
+    if not os.path.exists(index_dir):
+        os.makedirs(index_dir)
+        return create_in(index_dir, schema)
     else:
-        return open_dir(INDEX_DIR)
+        ix = open_dir(index_dir)
+        # Ajoute la colonne PageRank aux index créés avant son introduction
+        if "pagerank" not in ix.schema:
+            with ix.writer() as writer:
+                writer.add_field("pagerank", pagerank_field())
+            ix = open_dir(index_dir)
+        return ix
+
+def existing_partition_dirs():
+    """Retourne les répertoires de partition présents sur disque."""
+    if not os.path.isdir(INDEX_DIR):
+        return []
+    found = []
+    if exists_in(INDEX_DIR):
+        found.append(INDEX_DIR)
+    for name in sorted(os.listdir(INDEX_DIR)):
+        path = os.path.join(INDEX_DIR, name)
+        if name.startswith("part-") and os.path.isdir(path):
+            found.append(path)
+    return found
+
+def check_partition_layout():
+    """Vérifie que l'index sur disque correspond à INDEX_PARTITIONS.
+
+    Changer le nombre de partitions laisse les pages déjà indexées dans
+    l'ancienne disposition : les recherches ne les trouveraient plus.
+    init_partitions() crée toujours toutes les partitions, même vides : une
+    partition manquante signale donc une autre disposition.
+    """
+    found = existing_partition_dirs()
+    if found and found != partition_dirs():
+        raise RuntimeError(
+            f"L'index {INDEX_DIR} contient {len(found)} partition(s) au lieu de {INDEX_PARTITIONS}. "
+            "Exécutez 'update-index --rebuild' pour le reconstruire."
+        )
+
+def init_partitions():
+    """Ouvre (ou crée) toutes les partitions de l'index, y compris les vides."""
+    check_partition_layout()
+    return [init_index(index_dir) for index_dir in partition_dirs()]
+
+def page_fields(doc):
+    """Champs Whoosh d'une page stockée dans MongoDB."""
+    fields = dict(
+        url=doc["url"],
+        title=doc["title"],
+        content=doc["content"],
+        snippet=doc.get("snippet", ""),
+        pagerank=doc.get("pagerank", DEFAULT_PAGERANK)
+    )
+    # Whoosh ne sait pas analyser les dates ISO stockées sous forme de chaîne
+    if isinstance(doc.get("crawled_date"), datetime):
+        fields["crawled_date"] = doc["crawled_date"]
+    return fields
 
 def add_doc_to_whoosh(ix, doc):
     with ix.writer() as writer:
-        writer.update_document(
-            url=doc["url"],
-            title=doc["title"],
-            content=doc["content"],
-            snippet=doc.get("snippet", ""),
-            crawled_date=doc.get("crawled_date")
-        )
\ No newline at end of file
+        writer.update_document(**page_fields(doc))
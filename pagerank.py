@@ -0,0 +1,121 @@
+from array import array
+from datetime import datetime
+
+import numpy as np
+from pymongo import UpdateOne
+from scipy import sparse
+
+from db import links_collection, pages_collection
+from settings import PAGERANK_DAMPING, PAGERANK_TOLERANCE, PAGERANK_MAX_ITER, PAGERANK_MIN_CHANGE, PAGERANK_BATCH_SIZE
+
+def load_link_graph():
+    """Charge les listes d'arêtes depuis MongoDB sous forme de tableaux compacts.
+
+    Retourne (urls, ids, src, dst) où src/dst sont des tableaux int32
+    d'identifiants de noeuds, urls la liste des URLs indexée par identifiant
+    et ids le dictionnaire inverse URL -> identifiant.
+    """
+    ids = {}
+    src, dst = array("i"), array("i")
+
+    def node_id(url):
+        node = ids.get(url)
+        if node is None:
+            node = ids[url] = len(ids)
+        return node
+
+    cursor = links_collection.find({}, {"url": 1, "links": 1, "_id": 0}, batch_size=PAGERANK_BATCH_SIZE)
+    for doc in cursor:
+        source = node_id(doc["url"])
+        for link in doc.get("links", []):
+            src.append(source)
+            dst.append(node_id(link))
+
+    urls = [None] * len(ids)
+    for url, node in ids.items():
+        urls[node] = url
+    return urls, ids, np.frombuffer(src, dtype=np.int32), np.frombuffer(dst, dtype=np.int32)
+
+def pagerank_vector(src, dst, n, damping=PAGERANK_DAMPING, tol=PAGERANK_TOLERANCE, max_iter=PAGERANK_MAX_ITER, start=None):
+    """Calcule le PageRank par itération de puissance sur une matrice creuse.
+
+    `start` permet de repartir des scores précédents (recalcul incrémental) :
+    après un crawl, le graphe change peu et la convergence est bien plus rapide.
+    Retourne (scores, iterations), les scores sommant à 1.
+    """
+    if n == 0:
+        return np.zeros(0), 0
+
+    out_degree = np.bincount(src, minlength=n).astype(np.float64)
+    weights = 1.0 / out_degree[src]
+    # Matrice de transition transposée : M[dst, src] = 1 / degré_sortant(src)
+    transition = sparse.csr_matrix((weights, (dst, src)), shape=(n, n), dtype=np.float64)
+    dangling = out_degree == 0
+
+    if start is None:
+        ranks = np.full(n, 1.0 / n)
+    else:
+        ranks = np.asarray(start, dtype=np.float64)
+        ranks = ranks / ranks.sum() if ranks.sum() > 0 else np.full(n, 1.0 / n)
+
+    for iteration in range(1, max_iter + 1):
+        # Les pages sans lien sortant redistribuent leur score uniformément
+        leaked = ranks[dangling].sum()
+        new_ranks = damping * (transition @ ranks) + (damping * leaked + 1.0 - damping) / n
+        delta = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if delta < tol:
+            break
+    return ranks, iteration
+
+def update_pagerank():
+    """Recalcule le PageRank du graphe de liens et le stocke sur les pages.
+
+    Les scores sont normalisés pour valoir 1 en moyenne sur les pages
+    crawlées (les cibles de liens jamais visitées ne comptent pas), ce qui
+    rend DEFAULT_PAGERANK neutre. Seules les pages dont
+    le score a changé sont réécrites et repassées en `index_pending` pour que
+    la prochaine mise à jour de l'index Whoosh prenne en compte le nouveau score.
+    """
+    urls, ids, src, dst = load_link_graph()
+    n = len(urls)
+    if n == 0:
+        print("🕸️ Graphe de liens vide, PageRank ignoré.")
+        return 0
+
+    # Démarrage à chaud depuis les scores précédemment calculés
+    previous = np.full(n, np.nan)
+    is_page = np.zeros(n, dtype=bool)
+    for page in pages_collection.find({}, {"url": 1, "pagerank": 1, "_id": 0}):
+        i = ids.get(page["url"])
+        if i is not None:
+            is_page[i] = True
+            previous[i] = page.get("pagerank", np.nan)
+    del ids
+    start = np.where(np.isnan(previous), 1.0, previous)
+
+    ranks, iterations = pagerank_vector(src, dst, n, start=start)
+    if is_page.any():
+        ranks *= is_page.sum() / ranks[is_page].sum()
+
+    now = datetime.now()
+    updated = 0
+    operations = []
+    for i in np.flatnonzero(is_page):
+        score = float(ranks[i])
+        # Ignore les variations négligeables pour ne pas réindexer tout le corpus
+        if not np.isnan(previous[i]) and abs(score - previous[i]) <= PAGERANK_MIN_CHANGE * previous[i]:
+            continue
+        url = urls[i]
+        operations.append(UpdateOne(
+            {"url": url},
+            {"$set": {"pagerank": score, "pagerank_updated": now, "status": "index_pending"}}
+        ))
+        if len(operations) >= PAGERANK_BATCH_SIZE:
+            updated += pages_collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += pages_collection.bulk_write(operations, ordered=False).modified_count
+
+    print(f"🕸️ PageRank: {n} noeuds, {len(src)} liens, {iterations} itérations, {updated} pages mises à jour.")
+    return updated
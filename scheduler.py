@@ -0,0 +1,121 @@
+import hashlib
+import math
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from db import urls_collection
+from settings import RECRAWL_DELAY_DAYS, RECRAWL_MIN_DAYS, RECRAWL_MAX_DAYS, RECRAWL_BATCH_SIZE
+
+def content_hash(content):
+    """Empreinte du texte d'une page, pour détecter ses modifications."""
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def change_rate(checks, changes, observed_days):
+    """Estime le taux de modification d'une page (changements par jour).
+
+    Estimateur de Cho & Garcia-Molina : on ne voit qu'au plus un changement
+    entre deux visites, le simple ratio changes / durée sous-estimerait donc
+    le taux des pages qui changent souvent. Une demi-visite fictive avec
+    modification sert d'a priori : sans elle, une seule visite sans
+    changement donnerait un taux nul et enverrait la page à RECRAWL_MAX_DAYS.
+    """
+    if checks == 0 or observed_days <= 0:
+        return None
+    mean_interval = observed_days / checks
+    return -math.log((checks - changes + 0.5) / (checks + 1.0)) / mean_interval
+
+def next_interval(rate):
+    """Délai avant la prochaine visite (en jours) pour un taux de modification donné."""
+    if rate is None:
+        return RECRAWL_DELAY_DAYS
+    if rate <= 0:
+        return RECRAWL_MAX_DAYS
+    return min(max(1.0 / rate, RECRAWL_MIN_DAYS), RECRAWL_MAX_DAYS)
+
+def schedule_after_fetch(url_doc, digest, now=None):
+    """Met à jour les statistiques de modification après une récupération.
+
+    Retourne (changed, fields) où fields contient les champs à enregistrer sur
+    l'URL, dont `next_crawl_at`.
+    """
+    now = now or datetime.now()
+    previous_hash = url_doc.get("content_hash")
+    checks = url_doc.get("checks", 0)
+    changes = url_doc.get("changes", 0)
+    observed_days = url_doc.get("observed_days", 0.0)
+
+    changed = previous_hash != digest
+    last_checked = url_doc.get("last_checked")
+    if previous_hash is not None and last_checked is not None:
+        checks += 1
+        changes += int(changed)
+        observed_days += (now - last_checked).total_seconds() / 86400
+
+    rate = change_rate(checks, changes, observed_days)
+    fields = {
+        "content_hash": digest,
+        "checks": checks,
+        "changes": changes,
+        "observed_days": observed_days,
+        "change_rate": rate,
+        "last_checked": now,
+        "next_crawl_at": now + timedelta(days=next_interval(rate))
+    }
+    if url_doc.get("first_checked") is None:
+        fields["first_checked"] = now
+    return changed, fields
+
+def error_backoff(retries):
+    """Délai (en jours) avant de réessayer une URL connue après un échec."""
+    return min(RECRAWL_MIN_DAYS * 2 ** retries, RECRAWL_MAX_DAYS)
+
+def backfill_schedule(now=None):
+    """Planifie les URLs enregistrées avant l'introduction de `next_crawl_at`."""
+    now = now or datetime.now()
+    operations, updated = [], 0
+    projection = {"last_crawled": 1, "discovered_at": 1}
+    for doc in urls_collection.find({"next_crawl_at": {"$exists": False}}, projection):
+        if doc.get("last_crawled"):
+            next_crawl_at = doc["last_crawled"] + timedelta(days=RECRAWL_DELAY_DAYS)
+        else:
+            next_crawl_at = doc.get("discovered_at") or now
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"next_crawl_at": next_crawl_at}}))
+        if len(operations) >= RECRAWL_BATCH_SIZE:
+            updated += urls_collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += urls_collection.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+def recrawl_report(now=None):
+    """Mesure le budget de récupération économisé et la fraîcheur estimée de l'index.
+
+    Le budget économisé est comparé à une planification fixe tous les
+    RECRAWL_DELAY_DAYS jours sur la même période d'observation. La fraîcheur
+    est la probabilité moyenne qu'une page n'ait pas changé depuis sa dernière
+    visite, exp(-taux * âge), selon le taux estimé.
+    """
+    now = now or datetime.now()
+    report = {"urls": 0, "fetches": 0, "fixed_fetches": 0, "changes": 0, "checks": 0, "overdue": 0}
+    freshness = []
+    projection = {"first_checked": 1, "last_checked": 1, "checks": 1, "changes": 1, "change_rate": 1, "next_crawl_at": 1}
+    for doc in urls_collection.find({"last_checked": {"$exists": True}}, projection):
+        report["urls"] += 1
+        report["fetches"] += doc.get("checks", 0) + 1
+        span_days = (doc["last_checked"] - doc.get("first_checked", doc["last_checked"])).total_seconds() / 86400
+        report["fixed_fetches"] += 1 + int(span_days // RECRAWL_DELAY_DAYS)
+        report["checks"] += doc.get("checks", 0)
+        report["changes"] += doc.get("changes", 0)
+        if doc.get("next_crawl_at") and doc["next_crawl_at"] < now:
+            report["overdue"] += 1
+        rate = doc.get("change_rate")
+        if rate is not None:
+            age_days = (now - doc["last_checked"]).total_seconds() / 86400
+            freshness.append(math.exp(-rate * age_days))
+
+    report["saved_fetches"] = report["fixed_fetches"] - report["fetches"]
+    report["saved_ratio"] = report["saved_fetches"] / report["fixed_fetches"] if report["fixed_fetches"] else 0.0
+    report["change_ratio"] = report["changes"] / report["checks"] if report["checks"] else 0.0
+    report["freshness"] = sum(freshness) / len(freshness) if freshness else None
+    return report
@@ -1,14 +1,177 @@
+import heapq
+import math
+import multiprocessing
+import os
+import threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from whoosh.qparser import MultifieldParser
-from whoosh import scoring
-from db import pages_collection
+from whoosh import collectors, scoring
+from whoosh.index import open_dir
+from settings import PAGERANK_WEIGHT, DEFAULT_PAGERANK
+
+# Pool de processus pour interroger les partitions, créé à la première
+# recherche sur plusieurs partitions (le scoring Whoosh est du Python pur :
+# des threads se partageraient un seul coeur à cause du GIL)
+search_pool = None
+search_pool_lock = threading.Lock()
+
+# Partitions ouvertes dans chaque processus du pool, une seule fois
+worker_indexes = {}
+
+def pagerank_lookup(reader):
+    """Retourne une fonction docnum -> PageRank pour un lecteur d'index.
+
+    Les colonnes sont lues segment par segment : MultiReader.column_reader
+    ignore les segments sans colonne (écrits avant son ajout) et décale alors
+    les docnums. Ces documents reçoivent le PageRank neutre.
+    """
+    offsets, columns = [], []
+    for leaf, offset in reader.leaf_readers():
+        offsets.append(offset)
+        has_column = "pagerank" in leaf.schema and leaf.has_column("pagerank")
+        columns.append(leaf.column_reader("pagerank") if has_column else None)
+
+    def lookup(docnum):
+        i = bisect_right(offsets, docnum) - 1
+        if columns[i] is None:
+            return DEFAULT_PAGERANK
+        return columns[i][docnum - offsets[i]]
+
+    return lookup
+
+class PartitionStats:
+    """Statistiques BM25F agrégées sur toutes les partitions de l'index.
+
+    Calculées une fois par requête avant la distribution, pour que chaque
+    partition produise des scores comparables à ceux d'un index unique.
+    """
+
+    def __init__(self, readers, query):
+        self.doc_count = sum(r.doc_count_all() for r in readers)
+        terms = set()
+        for r in readers:
+            terms |= query.existing_terms(r, expand=True)
+        self.doc_frequency = {
+            term: sum(r.doc_frequency(*term) for r in readers) for term in terms
+        }
+        self.field_length = {
+            fieldname: sum(r.field_length(fieldname) for r in readers)
+            for fieldname in {fieldname for fieldname, _ in terms}
+        }
+
+    def idf(self, fieldname, text):
+        n = self.doc_frequency.get((fieldname, text), 0)
+        return math.log(self.doc_count / (n + 1)) + 1
+
+    def avg_field_length(self, fieldname):
+        return self.field_length.get(fieldname, 0) / (self.doc_count or 1)
+
+class PartitionBM25FScorer(scoring.BM25FScorer):
+    """Scorer BM25F utilisant l'IDF et la longueur moyenne globales."""
+
+    def __init__(self, searcher, fieldname, text, B, K1, stats, qf=1):
+        self.idf = stats.idf(fieldname, text)
+        self.avgfl = stats.avg_field_length(fieldname) or 1
+        self.B = B
+        self.K1 = K1
+        self.qf = qf
+        self.setup(searcher, fieldname, text)
+
+class PageRankBM25F(scoring.BM25F):
+    """BM25F dont le score final est pondéré par le PageRank du document."""
+
+    use_final = True
+
+    def __init__(self, pagerank_weight=PAGERANK_WEIGHT, stats=None, **kwargs):
+        super().__init__(**kwargs)
+        self.pagerank_weight = pagerank_weight
+        self.stats = stats
+        self._pagerank = None
+
+    def scorer(self, searcher, fieldname, text, qf=1):
+        if self.stats is None or not searcher.schema[fieldname].scorable:
+            return super().scorer(searcher, fieldname, text, qf=qf)
+        B = self._field_B.get(fieldname, self.B)
+        return PartitionBM25FScorer(searcher, fieldname, text, B, self.K1, self.stats, qf=qf)
+
+    def final(self, searcher, docnum, score):
+        if self._pagerank is None:
+            self._pagerank = pagerank_lookup(searcher.reader())
+        # Le PageRank vaut 1 en moyenne : log1p amortit l'effet des hubs
+        return score * (1.0 + self.pagerank_weight * math.log1p(self._pagerank(docnum)))
+
+def top_collector(limit):
+    """Collecteur top-k sans élagage des matchers.
+
+    Whoosh élague avec le score minimal calculé après `final()` : avec le
+    bonus PageRank, des documents pertinents seraient écartés à tort.
+    """
+    return collectors.TopCollector(limit, usequality=False, replace=0)
 
 def search_func(query_str, ix, limit=10):
+    from db import pages_collection
     parser = MultifieldParser(["title", "content"], ix.schema, fieldboosts={"title": 2.0, "content": 1.0})
     query = parser.parse(query_str)
-    with ix.searcher(weighting=scoring.BM25F()) as searcher:
-        results = searcher.search(query, limit=limit)
+    with ix.searcher(weighting=PageRankBM25F()) as searcher:
+        collector = top_collector(limit)
+        searcher.search_with_collector(query, collector)
+        results = collector.results()
         print(f"🔎 Recherche '{query_str}' → {len(results)} résultat(s)")
         for r in results:
             url, title = r["url"], r["title"]
             snippet = pages_collection.find_one({"url": url}, {"snippet": 1}).get("snippet", "")
-            print(f"- {title} ({url})\n  {snippet}\n")
\ No newline at end of file
+            print(f"- {title} ({url})\n  {snippet}\n")
+
+def run_search(searcher, query, limit):
+    """Top-k d'une partition, sous forme de (score, champs stockés)."""
+    with searcher:
+        collector = top_collector(limit)
+        searcher.search_with_collector(query, collector)
+        results = collector.results()
+        return [(hit.score, hit.fields()) for hit in results], len(results)
+
+def search_worker(index_dir, query, limit, stats):
+    """Recherche exécutée dans un processus du pool."""
+    ix = worker_indexes.get(index_dir)
+    if ix is None:
+        ix = worker_indexes[index_dir] = open_dir(index_dir)
+    return run_search(ix.searcher(weighting=PageRankBM25F(stats=stats)), query, limit)
+
+def get_search_pool(partitions):
+    global search_pool
+    # Les recherches de l'API arrivent de plusieurs threads
+    with search_pool_lock:
+        if search_pool is None:
+            # "spawn" : pas de fork d'un serveur qui a déjà des threads. Les
+            # processus réimportent le module principal, qui doit donc rester
+            # sans effet de bord à l'import (cf. api.py)
+            context = multiprocessing.get_context("spawn")
+            search_pool = ProcessPoolExecutor(max_workers=min(partitions, os.cpu_count() or 1), mp_context=context)
+    return search_pool
+
+def search_partitions(ixs, query, limit=10):
+    """Interroge toutes les partitions en parallèle et fusionne le top-k.
+
+    Chaque partition est cherchée dans un processus du pool, avec les
+    statistiques BM25F globales calculées ici. Une partition unique est
+    cherchée directement, sans pool. Retourne (hits, total) où hits est une
+    liste de (score, champs stockés) triée par score décroissant.
+    """
+    if len(ixs) == 1:
+        return run_search(ixs[0].searcher(weighting=PageRankBM25F()), query, limit)
+
+    readers = []
+    try:
+        for ix in ixs:
+            readers.append(ix.reader())
+        stats = PartitionStats(readers, query)
+    finally:
+        for reader in readers:
+            reader.close()
+
+    pool = get_search_pool(len(ixs))
+    futures = [pool.submit(search_worker, ix.storage.folder, query, limit, stats) for ix in ixs]
+    partials = [future.result() for future in futures]
+    hits = heapq.nlargest(limit, (hit for partial, _ in partials for hit in partial), key=lambda hit: hit[0])
+    return hits, sum(total for _, total in partials)
@@ -5,6 +5,34 @@ load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 INDEX_DIR = "indexdir"
+# Nombre de partitions de l'index et répartition des URLs ("hash" ou "domain")
+INDEX_PARTITIONS = int(os.getenv("INDEX_PARTITIONS", 1))
+INDEX_PARTITION_MODE = os.getenv("INDEX_PARTITION_MODE", "hash")
+INDEX_BATCH_SIZE = 1000
 MY_USER_AGENT = "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
-RECRAWL_DELAY_DAYS = 7
-MAX_RETRIES = 3
\ No newline at end of file
+RECRAWL_DELAY_DAYS = 7  # Délai initial, avant toute estimation du taux de modification
+RECRAWL_MIN_DAYS = 0.5
+RECRAWL_MAX_DAYS = 60
+RECRAWL_BATCH_SIZE = 1000
+MAX_RETRIES = 3
+
+# PageRank calculé sur le graphe de liens et mélangé au score BM25F
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-6
+PAGERANK_MAX_ITER = 100
+PAGERANK_MIN_CHANGE = 0.01  # Variation relative minimale pour réindexer une page
+PAGERANK_BATCH_SIZE = 1000
+PAGERANK_WEIGHT = 0.5
+DEFAULT_PAGERANK = 1.0  # Score moyen des pages crawlées, attribué aux pages hors du graphe de liens
+
+# Suggestions par préfixe (/suggest), reconstruites en arrière-plan quand l'index change
+SUGGEST_MAX_ENTRIES = 100000
+SUGGEST_MAX_TERMS = 20000  # Par champ et par partition
+SUGGEST_MAX_TITLES = 50000
+SUGGEST_MAX_QUERIES = 20000
+SUGGEST_MAX_LENGTH = 100
+SUGGEST_TOP_K = 10
+SUGGEST_SCAN_LIMIT = 256  # Au-delà, le top-k du préfixe est précalculé
+SUGGEST_CHECK_SECONDS = 1.0
+SUGGEST_QUERY_TTL_DAYS = 90  # Les requêtes non revues depuis plus longtemps expirent
+SUGGEST_SOURCE_WEIGHTS = {"queries": 1.0, "titles": 0.6, "terms": 0.4}
@@ -0,0 +1,207 @@
+import heapq
+import os
+import threading
+import time
+from datetime import datetime
+from bisect import bisect_left, bisect_right
+
+from db import queries_collection
+from searcher import pagerank_lookup
+from settings import (SUGGEST_MAX_ENTRIES, SUGGEST_MAX_TERMS, SUGGEST_MAX_TITLES, SUGGEST_MAX_QUERIES,
+                      SUGGEST_MAX_LENGTH, SUGGEST_TOP_K, SUGGEST_SCAN_LIMIT, SUGGEST_CHECK_SECONDS,
+                      SUGGEST_SOURCE_WEIGHTS)
+
+# Borne supérieure pour délimiter toutes les clés commençant par un préfixe
+MAX_CHAR = "\U0010ffff"
+
+def normalize(text):
+    """Normalise une saisie : minuscules et espaces simples."""
+    return " ".join(text.casefold().split())
+
+def record_query(q):
+    """Comptabilise une requête pour les suggestions de requêtes populaires.
+
+    Appelée après la réponse : une erreur MongoDB ne doit pas faire échouer
+    la recherche. Les requêtes non revues depuis SUGGEST_QUERY_TTL_DAYS jours
+    expirent (index TTL sur `last_seen`).
+    """
+    query = normalize(q)
+    if not query or len(query) > SUGGEST_MAX_LENGTH:
+        return
+    try:
+        queries_collection.update_one(
+            {"query": query},
+            {"$inc": {"count": 1}, "$set": {"last_seen": datetime.now()}},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"⚠️ Impossible d'enregistrer la requête '{query}': {e}")
+
+class Suggester:
+    """Suggestions par préfixe sur un tableau trié de clés.
+
+    Les clés partageant un préfixe forment une plage contiguë du tableau. Pour
+    les préfixes couvrant plus de SUGGEST_SCAN_LIMIT clés, le top-k est
+    précalculé (comme les noeuds d'un trie) ; les autres plages sont assez
+    courtes pour être parcourues à la volée.
+    """
+
+    def __init__(self, entries, top_k=SUGGEST_TOP_K, scan_limit=SUGGEST_SCAN_LIMIT):
+        """`entries` associe chaque suggestion à son score."""
+        best = heapq.nlargest(SUGGEST_MAX_ENTRIES, entries.items(), key=lambda item: item[1])
+        best.sort()
+        self.keys = [key for key, _ in best]
+        self.scores = [score for _, score in best]
+        self.top_k = top_k
+        self.scan_limit = scan_limit
+        self.heavy = {}
+        self._build_heavy()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _top(self, lo, hi, k):
+        return heapq.nlargest(k, range(lo, hi), key=self.scores.__getitem__)
+
+    def _build_heavy(self):
+        keys = self.keys
+        stack = [("", 0, len(keys))]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            if hi - lo <= self.scan_limit:
+                continue
+            self.heavy[prefix] = self._top(lo, hi, self.top_k)
+            depth = len(prefix)
+            i = lo
+            # Découpe la plage selon le caractère suivant le préfixe
+            while i < hi:
+                if len(keys[i]) == depth:
+                    i += 1
+                    continue
+                child = keys[i][:depth + 1]
+                j = bisect_right(keys, child + MAX_CHAR, i, hi)
+                stack.append((child, i, j))
+                i = j
+
+    def suggest(self, prefix, limit=SUGGEST_TOP_K):
+        # Le top-k précalculé des grands préfixes limite le nombre de résultats
+        limit = max(1, min(limit, self.top_k))
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if prefix in self.heavy:
+            positions = self.heavy[prefix][:limit]
+        else:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_right(self.keys, prefix + MAX_CHAR, lo)
+            positions = self._top(lo, hi, limit)
+        return [self.keys[i] for i in positions]
+
+def build_entries(ixs):
+    """Rassemble les candidats : termes fréquents, titres et requêtes populaires.
+
+    Chaque source est normalisée par son score maximal puis pondérée par
+    SUGGEST_SOURCE_WEIGHTS ; une suggestion présente dans plusieurs sources
+    garde son meilleur score.
+    """
+    terms, titles = {}, {}
+    for ix in ixs:
+        with ix.reader() as reader:
+            for fieldname in ("title", "content"):
+                for frequency, text in reader.most_frequent_terms(fieldname, number=SUGGEST_MAX_TERMS):
+                    term = normalize(text.decode("utf-8") if isinstance(text, bytes) else text)
+                    if term:
+                        terms[term] = terms.get(term, 0) + frequency
+
+            pagerank = pagerank_lookup(reader)
+            for docnum, fields in reader.iter_docs():
+                title = normalize(fields.get("title", ""))
+                if title and len(title) <= SUGGEST_MAX_LENGTH:
+                    titles[title] = max(titles.get(title, 0.0), pagerank(docnum))
+
+    titles = dict(heapq.nlargest(SUGGEST_MAX_TITLES, titles.items(), key=lambda item: item[1]))
+    queries = {
+        doc["query"]: doc["count"]
+        for doc in queries_collection.find({}, {"query": 1, "count": 1, "_id": 0}).sort("count", -1).limit(SUGGEST_MAX_QUERIES)
+    }
+
+    entries = {}
+    for source, candidates in (("terms", terms), ("titles", titles), ("queries", queries)):
+        if not candidates:
+            continue
+        top = max(candidates.values())
+        weight = SUGGEST_SOURCE_WEIGHTS[source]
+        for key, score in candidates.items():
+            entries[key] = max(entries.get(key, 0.0), weight * score / top)
+    return entries
+
+class SuggestCache:
+    """Garde un Suggester en mémoire et le reconstruit quand l'index change.
+
+    Les constructions se font toujours en arrière-plan, jamais pendant une
+    requête : tant que le premier Suggester n'est pas prêt, aucune suggestion
+    n'est renvoyée, puis l'ancien répond pendant les reconstructions. La
+    version de l'index est vérifiée au plus toutes les SUGGEST_CHECK_SECONDS
+    secondes.
+    """
+
+    def __init__(self, ixs):
+        self.ixs = ixs
+        self.suggester = None
+        self.version = None
+        self.ready = threading.Event()
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._building = False
+
+    def index_version(self):
+        """Identifie le contenu des partitions par leur TOC courant.
+
+        Le numéro de génération seul ne suffit pas : il repart de zéro quand
+        INDEX_DIR est supprimé puis reconstruit. La date de modification du
+        fichier TOC distingue ces deux index.
+        """
+        version = []
+        for ix in self.ixs:
+            generation = ix.latest_generation()
+            toc = os.path.join(ix.storage.folder, f"_{ix.indexname}_{generation}.toc")
+            try:
+                version.append((generation, os.stat(toc).st_mtime_ns))
+            except OSError:
+                version.append((generation, None))
+        return tuple(version)
+
+    def start(self):
+        """Lance la première construction (au démarrage de l'API)."""
+        self._checked_at = time.monotonic()
+        self._rebuild_in_background(self.index_version())
+
+    def suggest(self, prefix, limit=SUGGEST_TOP_K):
+        now = time.monotonic()
+        if now - self._checked_at >= SUGGEST_CHECK_SECONDS:
+            self._checked_at = now
+            version = self.index_version()
+            if version != self.version:
+                self._rebuild_in_background(version)
+        suggester = self.suggester
+        return suggester.suggest(prefix, limit=limit) if suggester else []
+
+    def _rebuild_in_background(self, version):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+
+        def run():
+            try:
+                suggester = Suggester(build_entries(self.ixs))
+                self.suggester, self.version = suggester, version
+                self.ready.set()
+                print(f"💡 Suggestions reconstruites: {len(suggester)} entrées")
+            except Exception as e:
+                # La version n'est pas enregistrée : nouvel essai à la prochaine vérification
+                print(f"⚠️ Erreur lors de la construction des suggestions : {e}")
+            finally:
+                self._building = False
+
+        threading.Thread(target=run, daemon=True).start()
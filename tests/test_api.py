@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 from pathlib import Path
 
 # Ajoute le chemin racine du projet à sys.path
@@ -7,9 +8,10 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 import pytest
 from fastapi.testclient import TestClient
-from api import app, ix
+import api
+from api import app
 from indexer import init_index, add_doc_to_whoosh
-from db import pages_collection
+from db import pages_collection, queries_collection
 from datetime import datetime
 from settings import INDEX_DIR
 
@@ -26,6 +28,7 @@ def client():
 def setup_test_data():
     # Nettoie l'index et la base de données avant chaque test
     pages_collection.delete_many({})
+    queries_collection.delete_many({})
     if os.path.exists(INDEX_DIR):
         import shutil
         shutil.rmtree(INDEX_DIR)
@@ -48,6 +51,7 @@ def setup_test_data():
     yield
     # Nettoie après le test
     pages_collection.delete_many({})
+    queries_collection.delete_many({})
 
 # Test 1 : Vérifie que `/status` renvoie des informations valides
 def test_status_endpoint(client):
@@ -84,3 +88,19 @@ def test_search_no_results(client):
     assert response.status_code == 200
     data = response.json()
     assert len(data["results"]) == 0
+
+# Test 5 : Vérifie que `/suggest` complète un préfixe à partir de l'index
+def test_suggest_endpoint(client):
+    # Les suggestions sont construites en arrière-plan : on attend qu'elles reflètent l'index
+    assert api.suggestions.ready.wait(timeout=10)
+    deadline = time.monotonic() + 10
+    while True:
+        response = client.get("/suggest?q=te")
+        assert response.status_code == 200
+        data = response.json()
+        if "test page" in data["suggestions"] or time.monotonic() > deadline:
+            break
+        time.sleep(0.2)
+    assert data["query"] == "te"
+    assert "test page" in data["suggestions"]
+    assert len(client.get("/suggest?q=te&limit=-1").json()["suggestions"]) == 1
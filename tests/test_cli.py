@@ -9,7 +9,9 @@ sys.path.append(str(Path(__file__).parent.parent))
 import pytest
 from click.testing import CliRunner
 from cli import cli, crawl, update_index, search
-from indexer import init_index
+from indexer import init_index, init_partitions
+from crawler import index_partition, update_whoosh_index
+from datetime import datetime
 from db import pages_collection, urls_collection
 from settings import INDEX_DIR
 
@@ -85,3 +87,68 @@ def test_search_without_index():
 
     assert result.exit_code == 1  # Doit échouer avec un code d'erreur non-zéro
     assert "Index Whoosh n'est pas chargé" in result.output
+
+def test_update_index_rebuild_after_partition_change():
+    # Simule un index laissé par une autre configuration de partitions
+    os.makedirs(os.path.join(INDEX_DIR, "part-00"))
+    with pytest.raises(RuntimeError):
+        init_partitions()
+
+    pages_collection.insert_one({
+        "url": "https://example.com",
+        "title": "Test Page",
+        "content": "Ceci est un test.",
+        "snippet": "Ceci est un test...",
+        "status": "indexed"
+    })
+    runner = CliRunner()
+    result = runner.invoke(update_index, ["--rebuild"])
+    assert result.exit_code == 0
+    assert init_partitions()[0].doc_count() == 1
+
+def test_index_partition_keeps_pages_updated_meanwhile(monkeypatch):
+    import indexer
+    pages_collection.insert_one({
+        "url": "https://example.com",
+        "title": "Test Page",
+        "content": "Ceci est un test.",
+        "snippet": "Ceci est un test...",
+        "status": "index_pending"
+    })
+    page_fields = indexer.page_fields
+
+    # Un nouveau PageRank arrive pendant l'écriture de la partition
+    def concurrent_update(doc):
+        pages_collection.update_one({"_id": doc["_id"]}, {"$set": {"pagerank": 2.0, "pagerank_updated": datetime.now()}})
+        return page_fields(doc)
+
+    monkeypatch.setattr(indexer, "page_fields", concurrent_update)
+    ids = [page["_id"] for page in pages_collection.find({})]
+    index_partition(0, ids)
+    assert pages_collection.find_one({})["status"] == "index_pending"
+
+def test_update_index_creates_empty_partitions(monkeypatch):
+    import indexer
+    shutil.rmtree(INDEX_DIR)
+    monkeypatch.setattr(indexer, "INDEX_PARTITIONS", 4)
+    monkeypatch.setattr(indexer, "INDEX_PARTITION_MODE", "domain")
+    # Un seul domaine : toutes les pages vont dans la même partition
+    pages_collection.insert_many([{
+        "url": f"https://example.com/page{i}",
+        "title": f"Test Page {i}",
+        "content": "Ceci est un test.",
+        "snippet": "Ceci est un test...",
+        "status": "index_pending"
+    } for i in range(3)])
+
+    update_whoosh_index(processes=1)
+    assert indexer.existing_partition_dirs() == indexer.partition_dirs()
+    # Les mises à jour suivantes et l'ouverture de l'index acceptent les partitions vides
+    update_whoosh_index(processes=1)
+    ixs = init_partitions()
+    assert len(ixs) == 4
+    assert sorted(ix.doc_count() for ix in ixs) == [0, 0, 0, 3]
+
+    result = CliRunner().invoke(search, ["test"])
+    assert result.exit_code == 0
+    assert "Test Page" in result.output
@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+# Ajoute le chemin racine du projet à sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+from whoosh.qparser import QueryParser
+import crawler
+from db import links_collection, pages_collection, urls_collection
+from indexer import init_index, page_fields
+from pagerank import pagerank_vector, update_pagerank
+from searcher import search_partitions
+
+# Graphe : 0 -> 1, 0 -> 2, 1 -> 2, 2 -> 0, 3 -> 2 (3 n'a aucun lien entrant)
+SRC = np.array([0, 0, 1, 2, 3], dtype=np.int32)
+DST = np.array([1, 2, 2, 0, 2], dtype=np.int32)
+
+@pytest.fixture
+def graph():
+    for collection in (links_collection, pages_collection, urls_collection):
+        collection.delete_many({})
+    yield links_collection
+    for collection in (links_collection, pages_collection, urls_collection):
+        collection.delete_many({})
+
+# Test 1 : Les scores forment une distribution et favorisent la page la plus citée
+def test_pagerank_distribution():
+    ranks, _ = pagerank_vector(SRC, DST, 4)
+    assert ranks.sum() == pytest.approx(1.0)
+    assert ranks.argmax() == 2
+    assert ranks[3] == pytest.approx(0.15 / 4)
+
+# Test 2 : Les pages sans lien sortant ne font pas fuir de score
+def test_pagerank_dangling_nodes():
+    ranks, _ = pagerank_vector(np.array([0], dtype=np.int32), np.array([1], dtype=np.int32), 2)
+    assert ranks.sum() == pytest.approx(1.0)
+    assert ranks[1] > ranks[0]
+
+# Test 3 : Le démarrage à chaud converge vers le même résultat, plus vite
+def test_pagerank_warm_start():
+    ranks, iterations = pagerank_vector(SRC, DST, 4)
+    warm_ranks, warm_iterations = pagerank_vector(SRC, DST, 4, start=ranks * 4)
+    assert np.allclose(ranks, warm_ranks, atol=1e-6)
+    assert warm_iterations < iterations
+
+# Test 4 : Le crawler enregistre les liens sortants d'une page, sans doublon
+def test_crawler_stores_outgoing_links(graph, monkeypatch):
+    async def fake_fetch(session, url, headers=None):
+        return '<html><title>A</title><a href="/b">b</a><a href="/b">b</a><a href="https://c.com/">c</a></html>'
+    monkeypatch.setattr(crawler, "fetch", fake_fetch)
+    monkeypatch.setattr(crawler, "can_crawl", lambda url: (True, None))
+    monkeypatch.setattr(crawler.random, "uniform", lambda a, b: 0)
+
+    urls_collection.insert_one({"url": "https://a.com/", "status": "in_progress", "retries": 0})
+    asyncio.run(crawler.process_url(None, urls_collection.find_one({"url": "https://a.com/"})))
+
+    doc = graph.find_one({"url": "https://a.com/"})
+    assert sorted(doc["links"]) == ["https://a.com/b", "https://c.com/"]
+
+# Test 5 : update_pagerank normalise sur les pages crawlées et ne réindexe que les scores modifiés
+def test_update_pagerank(graph):
+    graph.insert_many([
+        {"url": "https://a.com", "links": ["https://b.com", "https://c.com"]},
+        {"url": "https://b.com", "links": ["https://c.com"]},
+        {"url": "https://c.com", "links": ["https://a.com", "https://uncrawled.com"]},
+    ])
+    pages_collection.insert_many([
+        {"url": url, "title": url, "content": "", "status": "indexed"}
+        for url in ("https://a.com", "https://b.com", "https://c.com")
+    ])
+
+    assert update_pagerank() == 3
+    pages = {page["url"]: page for page in pages_collection.find({})}
+    ranks = [page["pagerank"] for page in pages.values()]
+    # La cible jamais crawlée n'entre pas dans la moyenne : DEFAULT_PAGERANK reste neutre
+    assert np.mean(ranks) == pytest.approx(1.0)
+    assert max(pages, key=lambda url: pages[url]["pagerank"]) == "https://c.com"
+    assert all(page["status"] == "index_pending" for page in pages.values())
+
+    # Graphe inchangé : variations sous PAGERANK_MIN_CHANGE, aucune page n'est réindexée
+    pages_collection.update_many({}, {"$set": {"status": "indexed"}})
+    assert update_pagerank() == 0
+    assert pages_collection.count_documents({"status": "index_pending"}) == 0
+
+# Test 6 : À pertinence égale, la page au PageRank le plus élevé est classée en premier
+def test_pagerank_raises_ranking(tmp_path):
+    ix = init_index(str(tmp_path / "index"))
+    with ix.writer() as writer:
+        for url, pagerank in (("https://low.com", 0.2), ("https://high.com", 5.0), ("https://mid.com", 1.0)):
+            writer.add_document(**page_fields({"url": url, "title": "Python", "content": "python",
+                                               "pagerank": pagerank, "crawled_date": datetime.now()}))
+    query = QueryParser("content", ix.schema).parse("python")
+    hits, count = search_partitions([ix], query, limit=3)
+    assert count == 3
+    assert [hit["url"] for _, hit in hits] == ["https://high.com", "https://mid.com", "https://low.com"]
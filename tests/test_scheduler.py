@@ -0,0 +1,149 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+# Ajoute le chemin racine du projet à sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import asyncio
+import math
+import pytest
+from scheduler import (change_rate, next_interval, schedule_after_fetch, content_hash,
+                       recrawl_report, backfill_schedule, error_backoff)
+from crawler import get_next_url, process_url, reset_frontier
+import crawler
+from db import urls_collection
+from settings import RECRAWL_DELAY_DAYS, RECRAWL_MIN_DAYS, RECRAWL_MAX_DAYS
+
+@pytest.fixture
+def urls():
+    urls_collection.delete_many({})
+    yield urls_collection
+    urls_collection.delete_many({})
+
+# Test 1 : Sans observation, on garde le délai par défaut
+def test_first_fetch_uses_default_delay():
+    now = datetime(2025, 1, 1)
+    changed, fields = schedule_after_fetch({"url": "https://example.com"}, content_hash("a"), now=now)
+    assert changed
+    assert fields["checks"] == 0
+    assert fields["next_crawl_at"] == now + timedelta(days=RECRAWL_DELAY_DAYS)
+
+# Test 2 : Une page modifiée à chaque visite est revisitée plus tôt
+def test_changing_page_is_recrawled_sooner():
+    now = datetime(2025, 1, 8)
+    url_doc = {"content_hash": content_hash("a"), "last_checked": now - timedelta(days=7),
+               "checks": 3, "changes": 3, "observed_days": 21.0}
+    changed, fields = schedule_after_fetch(url_doc, content_hash("b"), now=now)
+    assert changed
+    assert fields["checks"] == 4 and fields["changes"] == 4
+    assert fields["next_crawl_at"] < now + timedelta(days=RECRAWL_DELAY_DAYS)
+
+# Test 3 : Une page stable est revisitée de moins en moins souvent
+def test_static_page_backs_off():
+    now = datetime(2025, 1, 8)
+    url_doc = {"content_hash": content_hash("a"), "last_checked": now - timedelta(days=7),
+               "checks": 3, "changes": 0, "observed_days": 21.0}
+    changed, fields = schedule_after_fetch(url_doc, content_hash("a"), now=now)
+    assert not changed
+    assert fields["next_crawl_at"] > now + timedelta(days=RECRAWL_DELAY_DAYS)
+
+# Test 3 bis : Une seule visite sans changement n'envoie pas la page au délai maximal
+def test_single_unchanged_visit_backs_off_gradually():
+    assert change_rate(1, 0, 7.0) > 0
+    assert RECRAWL_DELAY_DAYS < next_interval(change_rate(1, 0, 7.0)) < RECRAWL_MAX_DAYS
+    # Deux visites à 12 heures d'intervalle : trop peu d'observation pour espacer
+    assert next_interval(change_rate(1, 0, 0.5)) < RECRAWL_DELAY_DAYS
+
+# Test 4 : Le délai reste borné
+def test_next_interval_bounds():
+    assert change_rate(0, 0, 0) is None
+    assert next_interval(1000.0) == RECRAWL_MIN_DAYS
+    assert next_interval(0.0) == RECRAWL_MAX_DAYS
+    assert next_interval(change_rate(10, 5, 70.0)) == pytest.approx(1 / change_rate(10, 5, 70.0))
+
+# Test 5 : Rapport de recrawl (budget économisé, retards, fraîcheur)
+def test_recrawl_report(urls):
+    now = datetime(2025, 3, 1)
+    urls.insert_many([
+        # Page stable suivie 70 jours en 3 visites : 11 visites en planification fixe
+        {"url": "https://static.com", "first_checked": now - timedelta(days=80), "last_checked": now - timedelta(days=10),
+         "checks": 2, "changes": 0, "change_rate": 0.0, "next_crawl_at": now + timedelta(days=50)},
+        # Page qui change tous les jours, visitée 15 fois en 14 jours et en retard
+        {"url": "https://news.com", "first_checked": now - timedelta(days=15), "last_checked": now - timedelta(days=1),
+         "checks": 14, "changes": 14, "change_rate": 1.0, "next_crawl_at": now - timedelta(hours=12)},
+        # URL jamais récupérée : ignorée
+        {"url": "https://new.com", "next_crawl_at": now},
+    ])
+    report = recrawl_report(now=now)
+    assert report["urls"] == 2
+    assert report["fetches"] == 3 + 15
+    assert report["fixed_fetches"] == 11 + 3
+    assert report["saved_fetches"] == 14 - 18
+    assert report["change_ratio"] == pytest.approx(14 / 16)
+    assert report["overdue"] == 1
+    assert report["freshness"] == pytest.approx((1.0 + math.exp(-1.0)) / 2)
+
+# Test 6 : Les URLs sans `next_crawl_at` sont planifiées
+def test_backfill_schedule(urls):
+    now = datetime(2025, 3, 1)
+    crawled, discovered = datetime(2025, 1, 1), datetime(2025, 2, 1)
+    urls.insert_many([
+        {"url": "https://crawled.com", "last_crawled": crawled, "discovered_at": discovered},
+        {"url": "https://discovered.com", "discovered_at": discovered},
+        {"url": "https://bare.com"},
+        {"url": "https://scheduled.com", "next_crawl_at": now},
+    ])
+    assert backfill_schedule(now=now) == 3
+    schedule = {doc["url"]: doc["next_crawl_at"] for doc in urls.find({})}
+    assert schedule["https://crawled.com"] == crawled + timedelta(days=RECRAWL_DELAY_DAYS)
+    assert schedule["https://discovered.com"] == discovered
+    assert schedule["https://bare.com"] == now
+    assert schedule["https://scheduled.com"] == now
+
+# Test 7 : Les URLs déjà crawlées reviennent dans la file une fois dues
+def test_frontier_selects_due_urls(urls):
+    now = datetime.now()
+    urls.insert_many([
+        {"url": "https://later.com", "status": "done", "next_crawl_at": now + timedelta(days=1)},
+        {"url": "https://due.com", "status": "done", "next_crawl_at": now - timedelta(days=1)},
+        {"url": "https://new.com", "status": "pending", "next_crawl_at": now - timedelta(hours=1)},
+        {"url": "https://failed.com", "status": "error", "next_crawl_at": now - timedelta(days=2)},
+    ])
+    assert get_next_url()["url"] == "https://due.com"
+    assert get_next_url()["url"] == "https://new.com"
+    assert get_next_url() is None
+    assert urls.find_one({"url": "https://due.com"})["status"] == "in_progress"
+
+# Test 8 : Un échec temporaire ne fait pas perdre l'historique d'une URL suivie
+def test_fetch_error_keeps_known_url(urls, monkeypatch):
+    async def failing_fetch(session, url, headers=None):
+        return None
+    monkeypatch.setattr(crawler, "fetch", failing_fetch)
+    monkeypatch.setattr(crawler, "can_crawl", lambda url: (True, None))
+    monkeypatch.setattr(crawler.random, "uniform", lambda a, b: 0)
+
+    history = {"content_hash": content_hash("a"), "checks": 3, "changes": 1, "observed_days": 21.0,
+               "first_checked": datetime(2025, 1, 1), "last_checked": datetime(2025, 1, 22)}
+    urls.insert_one({"url": "https://known.com", "status": "in_progress", "retries": 0, **history})
+    asyncio.run(process_url(None, urls.find_one({"url": "https://known.com"})))
+
+    doc = urls.find_one({"url": "https://known.com"})
+    assert doc["status"] == "done"
+    assert doc["retries"] == 1
+    assert doc["next_crawl_at"] > datetime.now() + timedelta(days=error_backoff(0)) - timedelta(minutes=1)
+    assert all(doc[key] == value for key, value in history.items())
+
+# Test 9 : La purge avant un crawl ne supprime que les URLs jamais récupérées
+def test_reset_frontier_keeps_tracked_urls(urls):
+    now = datetime.now()
+    urls.insert_many([
+        {"url": "https://interrupted.com", "status": "in_progress", "last_checked": now, "next_crawl_at": now},
+        {"url": "https://failed.com", "status": "error", "last_checked": now, "next_crawl_at": now},
+        {"url": "https://seed.com", "status": "pending", "last_checked": now, "next_crawl_at": now},
+        {"url": "https://discovered.com", "status": "pending", "next_crawl_at": now},
+        {"url": "https://broken.com", "status": "error", "next_crawl_at": now},
+    ])
+    reset_frontier()
+    statuses = {doc["url"]: doc["status"] for doc in urls.find({})}
+    assert statuses == {"https://interrupted.com": "done", "https://failed.com": "done", "https://seed.com": "pending"}
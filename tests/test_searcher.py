@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+# Ajoute le chemin racine du projet à sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from whoosh.qparser import QueryParser
+from indexer import init_index, page_fields, partition_for
+from searcher import search_partitions
+
+PAGES = [
+    {"url": f"https://site{i % 3}.com/page{i}", "title": f"Page {i}",
+     "content": "python " * (i % 4 + 1) + "recherche web " * i, "pagerank": 1.0 + i % 2}
+    for i in range(12)
+]
+
+# Fixture : le même corpus dans un index unique et réparti sur 3 partitions
+@pytest.fixture
+def indexes(tmp_path):
+    single = init_index(str(tmp_path / "single"))
+    partitions = [init_index(str(tmp_path / f"part-{i:02d}")) for i in range(3)]
+    with single.writer() as writer:
+        for page in PAGES:
+            writer.add_document(**page_fields(page))
+    for i, ix in enumerate(partitions):
+        with ix.writer() as writer:
+            for page in PAGES:
+                if partition_for(page["url"], partitions=3) == i:
+                    writer.add_document(**page_fields(page))
+    return single, partitions
+
+# Test 1 : Une URL est toujours affectée à la même partition
+def test_partition_for_is_stable():
+    url = "https://example.com/page"
+    assert partition_for(url, partitions=4) == partition_for(url, partitions=4)
+    assert 0 <= partition_for(url, partitions=4) < 4
+    assert partition_for("https://example.com/a", partitions=4, mode="domain") == \
+        partition_for("https://example.com/b", partitions=4, mode="domain")
+
+# Test 2 : Le top-k fusionné a les mêmes scores qu'un index unique
+def test_search_partitions_matches_single_index(indexes):
+    single, partitions = indexes
+    query = QueryParser("content", single.schema).parse("python recherche")
+    expected, expected_count = search_partitions([single], query, limit=5)
+    hits, count = search_partitions(partitions, query, limit=5)
+    assert count == expected_count
+    assert [hit["url"] for _, hit in hits] == [hit["url"] for _, hit in expected]
+    assert [score for score, _ in hits] == pytest.approx([score for score, _ in expected])
+
+# Test 3 : Les documents indexés avant la colonne PageRank restent neutres
+def test_pagerank_missing_column_is_neutral(tmp_path):
+    from whoosh.fields import Schema, TEXT, ID
+    from whoosh.index import create_in
+    from searcher import pagerank_lookup
+    index_dir = tmp_path / "legacy"
+    index_dir.mkdir()
+    legacy = create_in(str(index_dir), Schema(url=ID(stored=True, unique=True), title=TEXT(stored=True),
+                                               content=TEXT, snippet=TEXT(stored=True)))
+    with legacy.writer() as writer:
+        writer.add_document(url="https://old.com", title="Old", content="python", snippet="")
+    ix = init_index(str(index_dir))
+    with ix.writer() as writer:
+        writer.add_document(**page_fields({"url": "https://new.com", "title": "New", "content": "python", "pagerank": 3.0}))
+        writer.add_document(**page_fields({"url": "https://plain.com", "title": "Plain", "content": "python"}))
+    with ix.searcher() as searcher:
+        lookup = pagerank_lookup(searcher.reader())
+        ranks = {searcher.stored_fields(docnum)["url"]: lookup(docnum) for docnum in range(3)}
+    assert ranks == {"https://old.com": 1.0, "https://new.com": 3.0, "https://plain.com": 1.0}
@@ -0,0 +1,72 @@
+import sys
+import random
+import time
+from pathlib import Path
+
+# Ajoute le chemin racine du projet à sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from indexer import init_index, page_fields
+from suggest import Suggester, SuggestCache, build_entries, normalize
+
+random.seed(0)
+ENTRIES = {
+    "".join(random.choice("abc") for _ in range(random.randint(1, 6))): random.random()
+    for _ in range(500)
+}
+
+def brute_force(prefix, limit):
+    matches = [key for key in ENTRIES if key.startswith(prefix)]
+    return sorted(matches, key=lambda key: ENTRIES[key], reverse=True)[:limit]
+
+# Test 1 : Le top-k (précalculé ou parcouru) correspond à un tri exhaustif
+@pytest.mark.parametrize("prefix", ["a", "ab", "abc", "cab", "bbbb", "ccccccc"])
+def test_suggest_matches_brute_force(prefix):
+    suggester = Suggester(ENTRIES, top_k=5, scan_limit=8)
+    assert prefix in suggester.heavy or len(brute_force(prefix, len(ENTRIES))) <= 8
+    assert suggester.suggest(prefix, limit=5) == brute_force(prefix, 5)
+
+# Test 2 : La saisie est normalisée et un préfixe vide ne suggère rien
+def test_suggest_normalizes_input():
+    suggester = Suggester({"python tutorial": 2.0, "python": 1.0, "pandas": 0.5})
+    assert normalize("  PYTHON   Tu") == "python tu"
+    assert suggester.suggest("  PYTHON   Tu") == ["python tutorial"]
+    assert suggester.suggest("py") == ["python tutorial", "python"]
+    assert suggester.suggest("   ") == []
+
+# Test 3 : La limite est ramenée entre 1 et top_k, y compris pour les grands préfixes
+def test_suggest_clamps_limit():
+    suggester = Suggester(ENTRIES, top_k=5, scan_limit=8)
+    assert "a" in suggester.heavy
+    assert suggester.suggest("a", limit=-1) == brute_force("a", 1)
+    assert suggester.suggest("a", limit=50) == brute_force("a", 5)
+    assert suggester.suggest("cab", limit=0) == brute_force("cab", 1)
+
+# Test 4 : Les termes de l'index sont normalisés comme la saisie
+def test_build_entries_normalizes_terms(tmp_path):
+    ix = init_index(str(tmp_path / "index"))
+    with ix.writer() as writer:
+        writer.add_document(**page_fields({"url": "https://example.de", "title": "Straße", "content": "Straße"}))
+    entries = build_entries([ix])
+    assert "strasse" in entries
+    assert Suggester(entries).suggest("STRASSE") == ["strasse"]
+
+# Test 5 : La version de l'index change après une reconstruction complète
+def test_index_version_changes_after_rebuild(tmp_path):
+    import shutil
+    index_dir = str(tmp_path / "index")
+    ix = init_index(index_dir)
+    with ix.writer() as writer:
+        writer.add_document(**page_fields({"url": "https://a.com", "title": "A", "content": "a"}))
+    cache = SuggestCache([ix])
+    before = cache.index_version()
+    shutil.rmtree(index_dir)
+    time.sleep(0.01)
+    ix = init_index(index_dir)
+    with ix.writer() as writer:
+        writer.add_document(**page_fields({"url": "https://b.com", "title": "B", "content": "b"}))
+    cache.ixs = [ix]
+    after = cache.index_version()
+    assert [generation for generation, _ in before] == [generation for generation, _ in after]
+    assert before != after